@@ -0,0 +1,62 @@
+'''
+Benchmark how the cost of the ward network model grows with the number
+of wards.
+
+Runs one replication of hospital_network() for an increasing number of
+hospital sites (three wards per site) and reports the run time per
+simulated patient-day.
+
+Usage (from the streamlit directory):
+    python network_benchmark.py
+'''
+import time
+
+from resources.network import WardNetwork, hospital_network
+
+# hospital sites to benchmark; each site has three wards
+N_SITES = [1, 2, 4, 8, 16, 32]
+
+# run length in days
+BENCHMARK_RUN_LENGTH = 365
+
+BENCHMARK_RNG_SET = 42
+
+
+def benchmark(n_sites, run_length=BENCHMARK_RUN_LENGTH):
+    '''
+    Time a single run of a network with n_sites hospital sites.
+
+    Params:
+    -------
+    n_sites: int
+        number of hospital sites
+
+    run_length: float, optional (default=BENCHMARK_RUN_LENGTH)
+        simulated days
+
+    Returns:
+    --------
+    dict
+    '''
+    scenario = hospital_network(n_sites, random_number_set=BENCHMARK_RNG_SET)
+    model = WardNetwork(scenario)
+
+    start = time.perf_counter()
+    model.run(results_collection_period=run_length)
+    seconds = time.perf_counter() - start
+
+    patient_days = sum(model.bed_time(ward) for ward in scenario.wards)
+    return {'wards': len(scenario.wards),
+            'arrivals': model.arrivals_count,
+            'patient_days': patient_days,
+            'seconds': seconds,
+            'us_per_patient_day': seconds / patient_days * 1e6}
+
+
+if __name__ == '__main__':
+    print(f'{"wards":>6} {"arrivals":>9} {"patient-days":>13} {"seconds":>8} '
+          + f'{"us/patient-day":>15}')
+    for n_sites in N_SITES:
+        r = benchmark(n_sites)
+        print(f'{r["wards"]:>6} {r["arrivals"]:>9} {r["patient_days"]:>13.0f} '
+              + f'{r["seconds"]:>8.2f} {r["us_per_patient_day"]:>15.2f}')
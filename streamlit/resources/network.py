@@ -0,0 +1,635 @@
+#multi-ward network model
+
+import numpy as np
+import pandas as pd
+import simpy
+from joblib import Parallel, delayed
+
+from resources import sim
+from resources.sim import Exponential, Lognormal, MonitoredPatient
+
+
+# Model parameters
+
+# patient types, in the order used by iat_means, treat_means and treat_stds
+PATIENT_TYPES = ['stroke', 'tia', 'neuro']
+
+# random number streams per ward: arrivals and lengths of stay for each
+# patient type plus one routing stream
+N_WARD_STREAMS = 2 * len(PATIENT_TYPES) + 1
+
+# uniforms drawn at a time for routing decisions
+ROUTING_BLOCK_SIZE = 1024
+
+# rehabilitation ward
+N_REHAB_BEDS = 10
+REHAB_TREAT_MEANs = [20.0, 7.0, 14.0]
+REHAB_TREAT_STDs = [15.0, 5.0, 10.0]
+
+# general neurology ward (takes its own neuro admissions)
+N_NEUROLOGY_BEDS = 6
+NEUROLOGY_MEAN_IATs = [None, None, 1.5]
+NEUROLOGY_TREAT_MEANs = [5.0, 2.0, 5.0]
+NEUROLOGY_TREAT_STDs = [4.0, 2.0, 4.0]
+
+# transfer probabilities on leaving each ward (the remainder go home)
+ASU_ROUTING = {'rehab': 0.30, 'neurology': 0.15}
+NEUROLOGY_ROUTING = {'rehab': 0.10}
+
+
+class Ward:
+    '''
+    Parameter container for one bed pool in a ward network.
+    '''
+    def __init__(self, name, n_beds, treat_means, treat_stds,
+                 iat_means=None, routing=None):
+        '''
+        Constructor
+
+        Params:
+        -------
+        name: str
+            unique name of the ward
+
+        n_beds: int
+            number of beds
+
+        treat_means: list
+            mean length of stay (days) for stroke, tia and neuro patients
+
+        treat_stds: list
+            standard deviation of length of stay for each patient type
+
+        iat_means: list, optional (default=None)
+            mean time between external arrivals for each patient type.
+            None (or a None entry) means no external arrivals.
+
+        routing: dict, optional (default=None)
+            maps downstream ward names to the probability a patient is
+            transferred there after their stay.  Patients not transferred
+            are discharged.
+        '''
+        self.name = name
+        self.n_beds = n_beds
+        self.treat_means = treat_means
+        self.treat_stds = treat_stds
+        if iat_means is None:
+            iat_means = [None] * len(PATIENT_TYPES)
+        self.iat_means = iat_means
+        self.routing = routing if routing is not None else {}
+
+
+class Router:
+    '''
+    Samples the next ward for patients leaving a ward.  Uniforms are
+    drawn and mapped to destinations in blocks to keep the cost per
+    transfer low.
+    '''
+    def __init__(self, routing, random_seed=None,
+                 block_size=ROUTING_BLOCK_SIZE):
+        '''
+        Constructor
+
+        Params:
+        -------
+        routing: dict
+            maps downstream ward names to transfer probabilities
+
+        random_seed: int, optional (default=None)
+            A random seed to reproduce samples.
+
+        block_size: int, optional (default=ROUTING_BLOCK_SIZE)
+            number of routing decisions sampled at a time.
+        '''
+        self.rand = np.random.default_rng(seed=random_seed)
+        self.destinations = list(routing.keys()) + [None]
+        self.cum_probs = np.cumsum(list(routing.values()))
+        self.block_size = block_size
+        self.block = []
+        self.position = 0
+
+    def sample(self):
+        '''
+        Return the name of the next ward, or None for discharge.
+        '''
+        if len(self.destinations) == 1:
+            return None
+
+        if self.position >= len(self.block):
+            u = self.rand.random(self.block_size)
+            idx = np.searchsorted(self.cum_probs, u, side='right')
+            self.block = [self.destinations[i] for i in idx]
+            self.position = 0
+
+        destination = self.block[self.position]
+        self.position += 1
+        return destination
+
+
+class NetworkScenario:
+    '''
+    Parameter container class for a network of wards.
+    '''
+    def __init__(self, wards, random_number_set=sim.DEFAULT_RNG_SET):
+        '''
+        Initialize the NetworkScenario object.
+
+        Parameters:
+        ----------
+        wards: list
+            the Ward objects in the network
+
+        random_number_set: int, optional
+            The random number set to be used by the simulation.
+        '''
+        # Warm-up period
+        self.warm_up = 0.0
+
+        self.wards = {ward.name: ward for ward in wards}
+        self.validate_routing()
+
+        # Sampling
+        self.random_number_set = random_number_set
+        self.init_sampling()
+
+    def validate_routing(self):
+        '''
+        Check routing refers to wards in the network, that transfer
+        probabilities from each ward sum to at most one and that routing
+        has no cycles.  Patients hold their bed while blocked, so a cycle
+        of full wards would deadlock.
+        '''
+        for ward in self.wards.values():
+            for destination in ward.routing:
+                if destination not in self.wards:
+                    raise ValueError(f'Ward {ward.name} routes to unknown '
+                                     + f'ward {destination}')
+            if sum(ward.routing.values()) > 1.0 + 1e-9:
+                raise ValueError(f'Routing probabilities for ward {ward.name} '
+                                 + 'sum to more than 1')
+
+        # depth first search for a ward that can be reached from itself
+        visiting, visited = set(), set()
+
+        def visit(name):
+            visiting.add(name)
+            for destination in self.wards[name].routing:
+                if destination in visiting:
+                    raise ValueError('Routing has a cycle through ward '
+                                     + f'{destination}; cyclic routing can '
+                                     + 'deadlock and is not supported')
+                if destination not in visited:
+                    visit(destination)
+            visiting.remove(name)
+            visited.add(name)
+
+        for name in self.wards:
+            if name not in visited:
+                visit(name)
+
+    def set_random_no_set(self, random_number_set):
+        '''
+        Set the random number set to be used by the simulation.
+
+        Parameters:
+        ----------
+        random_number_set: int
+            The random number set to be used by the simulation.
+        '''
+        self.random_number_set = random_number_set
+        self.init_sampling()
+
+    def init_sampling(self):
+        '''
+        Initialize the random number streams and create the distributions
+        used by the simulation.  Each ward has N_WARD_STREAMS streams.
+        '''
+        rng_streams = np.random.default_rng(self.random_number_set)
+        self.seeds = rng_streams.integers(0, 999999999,
+                                          size=N_WARD_STREAMS * len(self.wards))
+
+        self.arrival_dist_samples = {}
+        self.treatment_dist_samples = {}
+        self.routers = {}
+
+        for w, ward in enumerate(self.wards.values()):
+            seeds = self.seeds[w * N_WARD_STREAMS:(w + 1) * N_WARD_STREAMS]
+            n_types = len(PATIENT_TYPES)
+
+            # external arrivals, only for patient types with a mean IAT
+            self.arrival_dist_samples[ward.name] = {
+                patient_type: Exponential(ward.iat_means[i], random_seed=seeds[i])
+                for i, patient_type in enumerate(PATIENT_TYPES)
+                if ward.iat_means[i] is not None
+            }
+
+            self.treatment_dist_samples[ward.name] = {
+                patient_type: Lognormal(ward.treat_means[i], ward.treat_stds[i],
+                                        random_seed=seeds[n_types + i])
+                for i, patient_type in enumerate(PATIENT_TYPES)
+            }
+
+            self.routers[ward.name] = Router(ward.routing,
+                                             random_seed=seeds[-1])
+
+
+def hospital_network(n_sites=1, random_number_set=sim.DEFAULT_RNG_SET):
+    '''
+    Create a NetworkScenario with an ASU, rehabilitation ward and general
+    neurology ward at each of n_sites hospitals.  With a single site the
+    wards are named 'asu', 'rehab' and 'neurology'; otherwise the site
+    number is appended.
+
+    Params:
+    -------
+    n_sites: int, optional (default=1)
+        number of hospital sites
+
+    random_number_set: int, optional
+        The random number set to be used by the simulation.
+
+    Returns:
+    --------
+    NetworkScenario
+    '''
+    wards = []
+    for site in range(n_sites):
+        suffix = '' if n_sites == 1 else f' {site + 1}'
+        asu, rehab, neurology = ['asu' + suffix, 'rehab' + suffix,
+                                 'neurology' + suffix]
+
+        wards.append(Ward(asu, sim.N_BEDS, sim.TREAT_MEANs, sim.TREAT_STDs,
+                          iat_means=sim.MEAN_IATs,
+                          routing={rehab: ASU_ROUTING['rehab'],
+                                   neurology: ASU_ROUTING['neurology']}))
+        wards.append(Ward(rehab, N_REHAB_BEDS, REHAB_TREAT_MEANs,
+                          REHAB_TREAT_STDs))
+        wards.append(Ward(neurology, N_NEUROLOGY_BEDS, NEUROLOGY_TREAT_MEANs,
+                          NEUROLOGY_TREAT_STDs, iat_means=NEUROLOGY_MEAN_IATs,
+                          routing={rehab: NEUROLOGY_ROUTING['rehab']}))
+
+    return NetworkScenario(wards, random_number_set=random_number_set)
+
+
+# Model building
+
+class NetworkPatient(MonitoredPatient):
+    '''
+    A patient moving through a network of wards.
+
+    After each stay the patient is routed to another ward or discharged.
+    A patient transferring to a full ward keeps their current bed until a
+    bed downstream is free (blocking after service).
+    '''
+    def __init__(self, identifier, patient_type, ward, env, args, model):
+        '''
+        Constructor
+
+        Params:
+        -------
+        identifier: int
+            The identifier for the patient
+
+        patient_type: str
+            The type of patient, either 'stroke', 'tia', or 'neuro'
+
+        ward: str
+            The ward the patient arrives at
+
+        env: simpy.Environment
+            The simulation environment
+
+        args: NetworkScenario
+            The input data for the scenario
+
+        model: WardNetwork
+            The model to be observed
+        '''
+        # beds and treatment_dist_samples are keyed by ward name
+        super().__init__(identifier, patient_type, env, args, model)
+        self.ward = ward
+        self.routers = args.routers
+
+    def treatment(self):
+        '''
+        The patient's path through the network.  The patient queues for a
+        bed in their arrival ward, then after each stay either transfers
+        (holding their bed until the next ward admits them) or is
+        discharged.
+        '''
+        ward = self.ward
+        arrival_time = self.env.now
+
+        req = self.beds[ward].request()
+        yield req
+        self.queue_time = self.env.now - arrival_time
+        self.notify_observers(self, 'admitted', ward=ward)
+
+        while True:
+            admitted_time = self.env.now
+            self.treat_time = \
+                self.treatment_dist_samples[ward][self.patient_type].sample()
+            yield self.env.timeout(self.treat_time)
+
+            next_ward = self.routers[ward].sample()
+            blocked_from = self.env.now
+            if next_ward is not None:
+                next_req = self.beds[next_ward].request()
+                yield next_req
+
+            self.beds[ward].release(req)
+            self.notify_observers(self, 'left_ward', ward=ward,
+                                  admitted_time=admitted_time,
+                                  blocked_from=blocked_from,
+                                  transferred=next_ward is not None)
+            if next_ward is None:
+                break
+
+            if sim.TRACE:
+                sim.trace(f'Patient № {self.identifier} transferred from {ward} '
+                          + f'to {next_ward} at {self.env.now:.3f}')
+
+            # time blocked in the upstream ward is the queue for this ward
+            self.queue_time = self.env.now - blocked_from
+            ward, req = next_ward, next_req
+            self.notify_observers(self, 'admitted', ward=ward)
+
+        self.patient_discharged()
+
+
+class WardNetwork:
+    '''
+    Model of a network of wards with transfers and downstream blocking.
+
+    Metrics are kept as running totals rather than a list of patients so
+    memory use does not grow with the number of patient-days simulated.
+    '''
+    def __init__(self, args):
+        '''
+        Contructor
+
+        Params:
+        -------
+        args: NetworkScenario
+            container class for simulation model inputs.
+        '''
+        self.env = simpy.Environment()
+        self.args = args
+        self.init_model_resources()
+
+        self.arrivals_count = 0
+        self.discharge_count = 0
+
+        # running totals for each ward
+        self.admissions = dict.fromkeys(args.wards, 0)
+        self.queue_time = dict.fromkeys(args.wards, 0.0)
+        self.admitted_4_hrs = dict.fromkeys(args.wards, 0)
+        self.bed_occupation_time = dict.fromkeys(args.wards, 0.0)
+        self.blocked_time = dict.fromkeys(args.wards, 0.0)
+        self.transfers_out = dict.fromkeys(args.wards, 0)
+
+        # admission time of each patient currently in a bed, by ward, so
+        # stays still in progress at the end of a run are counted
+        self.occupants = {ward: {} for ward in args.wards}
+
+    def init_model_resources(self):
+        '''
+        Setup a simpy resource for the beds in each ward.
+        '''
+        self.args.beds = {name: simpy.Resource(self.env, capacity=ward.n_beds)
+                          for name, ward in self.args.wards.items()}
+
+    def run(self, results_collection_period=sim.RUN_LENGTH, warm_up=0):
+        '''
+        Conduct a single run of the model in its current
+        configuration
+
+        run length = results_collection_period + warm_up
+
+        Parameters:
+        ----------
+        results_collection_period, float, optional
+            default = RUN_LENGTH
+
+        warm_up, float, optional (default=0)
+            length of initial transient period to truncate
+            from results.
+        '''
+        for ward, dists in self.args.arrival_dist_samples.items():
+            for patient_type in dists:
+                self.env.process(self.arrivals_generator(ward, patient_type))
+
+        self.env.run(until=results_collection_period+warm_up)
+
+    def arrivals_generator(self, ward, patient_type):
+        '''
+        External arrivals of one patient type to a ward.
+        '''
+        arrival_dist = self.args.arrival_dist_samples[ward][patient_type]
+
+        while True:
+            yield self.env.timeout(arrival_dist.sample())
+
+            if self.env.now > self.args.warm_up:
+                self.arrivals_count += 1
+
+            if sim.TRACE:
+                sim.trace(f'Patient № {self.arrivals_count} ({patient_type}) '
+                          + f'arrives at {ward} at {self.env.now:.3f}')
+
+            new_patient = NetworkPatient(self.arrivals_count, patient_type,
+                                         ward, self.env, self.args, self)
+            self.env.process(new_patient.treatment())
+
+    def process_event(self, *args, **kwargs):
+        '''
+        Running calculations each time a patient is admitted to or leaves
+        a ward, or is discharged from the network.
+
+        Params:
+        --------
+        *args: list
+            the patient and the event name
+
+        *kwargs: dict
+            ward, and for 'left_ward' events the admitted_time and
+            blocked_from times of the stay and whether the patient
+            transferred to another ward.
+        '''
+        patient = args[0]
+        msg = args[1]
+        warm_up = self.args.warm_up
+        now = self.env.now
+
+        # track who is in a bed, including during the warm-up period
+        if msg == 'admitted':
+            self.occupants[kwargs['ward']][patient] = now
+        elif msg == 'left_ward':
+            del self.occupants[kwargs['ward']][patient]
+
+        #only run if warm up complete
+        if now < warm_up:
+            return
+
+        if msg == 'admitted':
+            ward = kwargs['ward']
+            self.admissions[ward] += 1
+            self.queue_time[ward] += patient.queue_time
+            if patient.queue_time * 24 <= 4:
+                self.admitted_4_hrs[ward] += 1
+
+        elif msg == 'left_ward':
+            # only count bed time after the warm-up period
+            ward = kwargs['ward']
+            self.bed_occupation_time[ward] += \
+                now - max(kwargs['admitted_time'], warm_up)
+            if kwargs['transferred']:
+                self.transfers_out[ward] += 1
+                self.blocked_time[ward] += \
+                    now - max(kwargs['blocked_from'], warm_up)
+
+        elif msg == 'patient_discharged':
+            self.discharge_count += 1
+
+    def bed_time(self, ward):
+        '''
+        Bed days used in a ward since the warm-up period, including the
+        stays of patients still in a bed.
+
+        Params:
+        -------
+        ward: str
+            name of the ward
+
+        Returns:
+        --------
+        float
+        '''
+        warm_up = self.args.warm_up
+        now = self.env.now
+        in_progress = sum(now - max(admitted_time, warm_up)
+                          for admitted_time in self.occupants[ward].values())
+        return self.bed_occupation_time[ward] + in_progress
+
+    def run_summary_frame(self):
+        '''
+        Utility function for final metrics calculation.
+
+        Returns a single row pandas DataFrame with network totals and
+        metrics for each ward.
+        '''
+        rc_period = self.env.now - self.args.warm_up
+
+        results = {'0 Total Patient Arrivals': self.arrivals_count,
+                   '1 Total Patient Discharges': self.discharge_count}
+
+        for name, ward in self.args.wards.items():
+            n = self.admissions[name]
+            transfers = self.transfers_out[name]
+            util = self.bed_time(name) / (rc_period * ward.n_beds)
+            results.update({
+                f'{name} Admissions': n,
+                f'{name} Mean Queue Time (hrs)':
+                    self.queue_time[name] / n * 24 if n else 0.0,
+                f'{name} Admitted within 4 hrs (%)':
+                    self.admitted_4_hrs[name] / n * 100 if n else 0.0,
+                f'{name} Bed Utilisation (%)': util * 100,
+                f'{name} Mean Blocked Time (hrs)':
+                    self.blocked_time[name] / transfers * 24 if transfers else 0.0
+            })
+
+        df = pd.DataFrame({'1': results}).T
+        df.index.name = 'rep'
+        return df
+
+
+# Functions for single and multiple runs
+def single_network_run(scenario,
+                       rc_period=sim.RUN_LENGTH,
+                       warm_up=0,
+                       random_no_set=sim.DEFAULT_RNG_SET):
+    '''
+    Perform a single run of the network model and return the results
+
+    Parameters:
+    -----------
+    scenario: NetworkScenario
+        The scenario/paramaters to run
+
+    rc_period: int
+        The length of the simulation run that collects results
+
+    warm_up: int, optional (default=0)
+        warm-up period in the model.  The model will not collect any results
+        before the warm-up period is reached.
+
+    random_no_set: int or None, optional (default=None)
+        Controls the set of random seeds used by the stochastic parts of the
+        model.
+
+    Returns:
+    --------
+        pandas.DataFrame:
+        results from single run.
+    '''
+    if random_no_set is not None:
+        scenario.set_random_no_set(random_no_set)
+    else:
+        # fresh entropy so each replication gets different streams
+        scenario.init_sampling()
+
+    scenario.warm_up = warm_up
+
+    model = WardNetwork(scenario)
+    model.run(results_collection_period=rc_period, warm_up=warm_up)
+
+    return model.run_summary_frame()
+
+
+def multiple_network_replications(scenario,
+                                  rc_period=sim.RUN_LENGTH,
+                                  warm_up=0,
+                                  n_reps=sim.DEFAULT_N_REPS,
+                                  n_jobs=-1):
+    '''
+    Perform multiple replications of the network model.
+
+    Params:
+    ------
+    scenario: NetworkScenario
+        Parameters/arguments to configure the model
+
+    rc_period: float, optional (default=RUN_LENGTH)
+        results collection period.
+
+    warm_up: float, optional (default=0)
+        initial transient period.  no results are collected in this period
+
+    n_reps: int, optional (default=DEFAULT_N_REPS)
+        Number of independent replications to run.
+
+    n_jobs, int, optional (default=-1)
+        No. replications to run in parallel.
+
+    Returns:
+    --------
+    pandas.DataFrame
+    '''
+    random_no_set = scenario.random_number_set
+
+    if random_no_set is not None:
+        rng_sets = [random_no_set + rep for rep in range(n_reps)]
+    else:
+        rng_sets = [None] * n_reps
+
+    res = Parallel(n_jobs=n_jobs)(delayed(single_network_run)(scenario,
+                                                              rc_period,
+                                                              warm_up,
+                                                              random_no_set=rng_set)
+                                  for rng_set in rng_sets)
+
+    # format and return results in a dataframe
+    df_results = pd.concat(res)
+    df_results.index = np.arange(1, len(df_results)+1)
+    df_results.index.name = 'rep'
+    return df_results
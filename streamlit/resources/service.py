@@ -0,0 +1,401 @@
+#local asynchronous simulation service
+
+'''
+A small asyncio service that runs ASU scenarios for several clients on
+localhost.
+
+Clients connect over TCP and send one JSON request per line.  The
+service streams back one JSON message per line: a 'replication' message
+as each replication finishes, then a 'done' message with the mean of all
+replications (or an 'error' message).
+
+Identical requests that arrive while one is in flight share a single
+computation; a client joining late is first sent the replications
+already finished.  Replications from all requests are queued on one
+process pool, so concurrent requests are batched onto the same workers.
+
+Start the service from the streamlit directory with:
+    python -m resources.service --port 8765
+'''
+
+import argparse
+import asyncio
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from resources.sim import (Scenario, single_run, RUN_LENGTH, DEFAULT_N_REPS,
+                           DEFAULT_RNG_SET, N_BEDS, MEAN_IATs, TREAT_MEANs,
+                           TREAT_STDs)
+
+
+# Service parameters
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+# largest number of replications a single request may ask for
+MAX_N_REPS = 1000
+
+# default request, matching the defaults of the streamlit front end
+DEFAULT_REQUEST = {'n_reps': DEFAULT_N_REPS,
+                   'rc_period': RUN_LENGTH,
+                   'warm_up': 0,
+                   'random_number_set': DEFAULT_RNG_SET,
+                   'n_beds': N_BEDS,
+                   'iat_means': MEAN_IATs,
+                   'treat_means': TREAT_MEANs,
+                   'treat_stds': TREAT_STDs}
+
+
+def normalise_request(request):
+    '''
+    Fill in defaults and check a scenario request.  Requests that
+    normalise to the same dict are merged into one computation.
+
+    Params:
+    -------
+    request: dict
+        request sent by a client.  Any key of DEFAULT_REQUEST may be given.
+
+    Returns:
+    --------
+    dict
+    '''
+    unknown = set(request) - set(DEFAULT_REQUEST)
+    if unknown:
+        raise ValueError(f'Unknown request parameters: {sorted(unknown)}')
+
+    params = dict(DEFAULT_REQUEST, **request)
+    if not 1 <= int(params['n_reps']) <= MAX_N_REPS:
+        raise ValueError(f'n_reps must be between 1 and {MAX_N_REPS}')
+
+    for key in ['iat_means', 'treat_means', 'treat_stds']:
+        if len(params[key]) != 3:
+            raise ValueError(f'{key} must have one value per patient type')
+
+    random_number_set = params['random_number_set']
+    return {'n_reps': int(params['n_reps']),
+            'rc_period': float(params['rc_period']),
+            'warm_up': float(params['warm_up']),
+            'random_number_set': (None if random_number_set is None
+                                  else int(random_number_set)),
+            'n_beds': int(params['n_beds']),
+            'iat_means': [float(x) for x in params['iat_means']],
+            'treat_means': [float(x) for x in params['treat_means']],
+            'treat_stds': [float(x) for x in params['treat_stds']]}
+
+
+def run_replication(params, rep):
+    '''
+    Run one replication of a normalised request.  Runs in a worker
+    process.  Seeds follow multiple_replications, so results match a
+    direct call with the same random_number_set.
+
+    Params:
+    -------
+    params: dict
+        normalised request
+
+    rep: int
+        zero based replication number
+
+    Returns:
+    --------
+    dict
+        results of the replication
+    '''
+    scenario = Scenario()
+    scenario.n_beds = params['n_beds']
+    scenario.iat_means = params['iat_means']
+    scenario.treat_means = params['treat_means']
+    scenario.treat_stds = params['treat_stds']
+
+    random_no_set = params['random_number_set']
+    if random_no_set is not None:
+        random_no_set += rep
+
+    res = single_run(scenario, params['rc_period'], params['warm_up'],
+                     random_no_set=random_no_set)
+    return {key: float(value) for key, value in res.iloc[0].items()}
+
+
+class SimulationJob:
+    '''
+    A request in flight, shared by every client that submitted it.
+    '''
+    def __init__(self, key, params):
+        '''
+        Constructor
+
+        Params:
+        -------
+        key: str
+            canonical json of the normalised request
+
+        params: dict
+            normalised request
+        '''
+        self.key = key
+        self.params = params
+        self.results = {}
+        self.subscribers = []
+
+    def subscribe(self):
+        '''
+        Return a queue that receives this job's messages, starting with
+        the replications already finished.
+        '''
+        queue = asyncio.Queue()
+        for rep, results in sorted(self.results.items()):
+            queue.put_nowait(replication_message(rep, results))
+        self.subscribers.append(queue)
+        return queue
+
+    def unsubscribe(self, queue):
+        '''
+        Stop sending messages to a queue, e.g. when its client disconnects.
+        '''
+        if queue in self.subscribers:
+            self.subscribers.remove(queue)
+
+    def publish(self, message):
+        '''
+        Send a message to every subscriber.
+        '''
+        for queue in self.subscribers:
+            queue.put_nowait(message)
+
+    def add_result(self, rep, results):
+        '''
+        Record a finished replication and stream it to subscribers.
+
+        Returns:
+        --------
+        bool
+            True once all replications are finished.
+        '''
+        self.results[rep] = results
+        self.publish(replication_message(rep, results))
+        return len(self.results) == self.params['n_reps']
+
+    def summary(self):
+        '''
+        Mean of each result over all replications.
+        '''
+        n = len(self.results)
+        keys = self.results[0].keys()
+        return {key: sum(r[key] for r in self.results.values()) / n
+                for key in keys}
+
+
+def replication_message(rep, results):
+    '''
+    Message streamed to clients when a replication finishes.
+    '''
+    return {'type': 'replication', 'rep': rep + 1, 'results': results}
+
+
+class SimulationService:
+    '''
+    Queues scenario requests, merges identical requests in flight and
+    runs their replications on a shared process pool.
+    '''
+    def __init__(self, n_workers=None):
+        '''
+        Constructor
+
+        Params:
+        -------
+        n_workers: int, optional (default=None)
+            number of worker processes.  Defaults to the number of CPUs.
+        '''
+        self.n_workers = n_workers or os.cpu_count()
+        self.executor = None
+        self.jobs = {}
+        self.work = None
+        self.dispatchers = []
+
+        # counters for monitoring and load tests
+        self.requests_received = 0
+        self.requests_merged = 0
+        self.replications_run = 0
+
+    async def start(self):
+        '''
+        Start the worker pool and the dispatchers that feed it.
+        '''
+        self.executor = ProcessPoolExecutor(max_workers=self.n_workers)
+        self.work = asyncio.Queue()
+        self.dispatchers = [asyncio.ensure_future(self.dispatch())
+                            for _ in range(self.n_workers)]
+
+    async def stop(self):
+        '''
+        Cancel the dispatchers and shut down the worker pool.
+        '''
+        for dispatcher in self.dispatchers:
+            dispatcher.cancel()
+        await asyncio.gather(*self.dispatchers, return_exceptions=True)
+        self.executor.shutdown()
+
+    async def dispatch(self):
+        '''
+        Take replications from the shared queue, whichever request they
+        belong to, and run them on the pool.
+        '''
+        loop = asyncio.get_event_loop()
+        while True:
+            job, rep = await self.work.get()
+            try:
+                if self.jobs.get(job.key) is not job:
+                    # job already failed
+                    continue
+                results = await loop.run_in_executor(self.executor,
+                                                     run_replication,
+                                                     job.params, rep)
+                self.replications_run += 1
+                if job.add_result(rep, results):
+                    del self.jobs[job.key]
+                    job.publish({'type': 'done',
+                                 'n_reps': job.params['n_reps'],
+                                 'mean': job.summary()})
+            except Exception as e:
+                if self.jobs.get(job.key) is job:
+                    del self.jobs[job.key]
+                job.publish({'type': 'error', 'message': repr(e)})
+            finally:
+                self.work.task_done()
+
+    async def submit(self, request):
+        '''
+        Submit a scenario request and stream back its messages.
+
+        Params:
+        -------
+        request: dict
+            scenario request.  See DEFAULT_REQUEST for the keys.
+
+        Returns:
+        --------
+        async generator of dict
+        '''
+        self.requests_received += 1
+        params = normalise_request(request)
+        key = json.dumps(params, sort_keys=True)
+
+        job = self.jobs.get(key)
+        if job is None:
+            job = SimulationJob(key, params)
+            self.jobs[key] = job
+            for rep in range(params['n_reps']):
+                self.work.put_nowait((job, rep))
+        else:
+            self.requests_merged += 1
+
+        queue = job.subscribe()
+        try:
+            while True:
+                message = await queue.get()
+                yield message
+                if message['type'] in ('done', 'error'):
+                    return
+        finally:
+            job.unsubscribe(queue)
+
+    async def handle_client(self, reader, writer):
+        '''
+        Serve one client connection: read a json request line and write
+        back a json line for each message.
+        '''
+        messages = None
+        try:
+            line = await reader.readline()
+            try:
+                request = json.loads(line) if line.strip() else {}
+                messages = self.submit(request)
+                async for message in messages:
+                    writer.write(json.dumps(message).encode() + b'\n')
+                    await writer.drain()
+            except (ValueError, TypeError) as e:
+                writer.write(json.dumps({'type': 'error',
+                                         'message': str(e)}).encode() + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            # unsubscribe a client that disconnected part way through
+            if messages is not None:
+                await messages.aclose()
+            writer.close()
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        '''
+        Start the service and listen on host:port.
+
+        Returns:
+        --------
+        asyncio.AbstractServer
+        '''
+        await self.start()
+        return await asyncio.start_server(self.handle_client, host, port)
+
+
+async def request_simulation(request, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    '''
+    Client for the service.  Sends a request and yields each message
+    streamed back.
+
+    Params:
+    -------
+    request: dict
+        scenario request.  See DEFAULT_REQUEST for the keys.
+
+    host: str, optional (default=DEFAULT_HOST)
+
+    port: int, optional (default=DEFAULT_PORT)
+
+    Returns:
+    --------
+    async generator of dict
+    '''
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(json.dumps(request).encode() + b'\n')
+        await writer.drain()
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            message = json.loads(line)
+            yield message
+            if message['type'] in ('done', 'error'):
+                return
+    finally:
+        writer.close()
+
+
+async def main(host, port, n_workers):
+    '''
+    Run the service until interrupted.
+    '''
+    service = SimulationService(n_workers)
+    server = await service.serve(host, port)
+    print(f'ASU simulation service listening on {host}:{port}')
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Local ASU simulation service')
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+    try:
+        asyncio.run(main(args.host, args.port, args.workers))
+    except KeyboardInterrupt:
+        pass
@@ -1,5 +1,7 @@
 #simulation model
 
+import os
+import json
 import numpy as np
 import pandas as pd
 import itertools
@@ -48,6 +50,34 @@ class Exponential:
         '''
         return self.rand.exponential(self.mean, size=size)
 
+class Uniform:
+    '''
+    Convenience class for the standard uniform distribution on [0, 1).
+    '''
+    def __init__(self, random_seed=None):
+        '''
+        Constructor
+
+        Params:
+        ------
+        random_seed: int, optional (default=None)
+            A random seed to reproduce samples.  If set to none then a unique
+            sample is created.
+        '''
+        self.rand = np.random.default_rng(seed=random_seed)
+
+    def sample(self, size=None):
+        '''
+        Generate a sample from the uniform distribution
+
+        Params:
+        -------
+        size: int, optional (default=None)
+            the number of samples to return.  If size=None then a single
+            sample is returned.
+        '''
+        return self.rand.random(size=size)
+
 class Lognormal:
     """
     Encapsulates a lognormal distirbution
@@ -92,6 +122,124 @@ class Lognormal:
         return self.rand.lognormal(self.mu, self.sigma)
 
 
+class BankedStream:
+    '''
+    One stream of pre-generated variates in a RandomNumberBank.
+
+    Holds the bank with a replication and stream index rather than the
+    variates themselves, so pickling a stream only pickles the bank (for
+    a file backed bank, just its path).
+    '''
+    def __init__(self, bank, replication, stream):
+        '''
+        Constructor
+
+        Params:
+        ------
+        bank: RandomNumberBank
+            The bank holding the variates
+
+        replication: int
+            zero based replication index
+
+        stream: int
+            stream index within the replication
+        '''
+        self.bank = bank
+        self.replication = replication
+        self.stream = stream
+        self.index = 0
+        self._variates = None
+
+    def sample(self, size=None):
+        '''
+        Return the next variates from the stream.
+
+        Params:
+        -------
+        size: int, optional (default=None)
+            the number of variates to return.  If size=None then a single
+            variate is returned.
+        '''
+        if self._variates is None:
+            self._variates = self.bank.variates[self.replication, self.stream]
+
+        n = 1 if size is None else size
+        if self.index + n > len(self._variates):
+            raise IndexError('Random number bank exhausted. '
+                             + 'Create the bank with a larger size.')
+        values = self._variates[self.index:self.index + n]
+        self.index += n
+        if size is None:
+            return float(values[0])
+        return values
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_variates'] = None
+        return state
+
+
+class BankedExponential:
+    '''
+    Exponential distribution that scales pre-generated standard exponential
+    variates from a RandomNumberBank rather than sampling its own
+    generator.
+    '''
+    def __init__(self, mean, stream):
+        '''
+        Constructor
+
+        Params:
+        ------
+        mean: float
+            The mean of the exponential distribution
+
+        stream: BankedStream
+            stream of standard exponential variates (mean 1).
+        '''
+        self.mean = mean
+        self.stream = stream
+
+    def sample(self, size=None):
+        '''
+        Generate a sample from the exponential distribution
+
+        Params:
+        -------
+        size: int, optional (default=None)
+            the number of samples to return.  If size=None then a single
+            sample is returned.
+        '''
+        return self.mean * self.stream.sample(size)
+
+
+class BankedLognormal(Lognormal):
+    """
+    Lognormal distribution that transforms pre-generated standard normal
+    variates from a RandomNumberBank rather than sampling its own
+    generator.
+    """
+    def __init__(self, mean, stdev, stream):
+        """
+        Params:
+        -------
+        mean = mean of the lognormal distribution
+        stdev = standard dev of the lognormal distribution
+        stream = BankedStream of standard normal variates
+        """
+        mu, sigma = self.normal_moments_from_lognormal(mean, stdev**2)
+        self.mu = mu
+        self.sigma = sigma
+        self.stream = stream
+
+    def sample(self):
+        """
+        Sample from the lognormal distribution
+        """
+        return math.exp(self.mu + self.sigma * self.stream.sample())
+
+
 # Utility functions
 
 
@@ -127,6 +275,13 @@ DEFAULT_N_REPS = 51
 DEFAULT_RNG_SET = None
 N_STREAMS = 10
 
+# random number bank: streams per replication and default variates per stream
+N_BANK_STREAMS = 9
+DEFAULT_BANK_SIZE = 5000
+
+# candidate arrivals generated per block for time varying arrivals
+THINNING_BLOCK_SIZE = 256
+
 # Turn off tracing
 TRACE = False
 
@@ -143,13 +298,338 @@ TREAT_MEANs = [7.4, 1.8, 2.0]
 TREAT_STDs = [8.5, 2.3, 2.5]
 
 
+# Random number bank
+
+class RandomNumberBank:
+    '''
+    Pre-generated bank of random variates shared by many replications
+    and scenarios.
+
+    For each replication the bank holds N_BANK_STREAMS streams: standard
+    exponential variates for the stroke, tia and neuro arrivals, standard
+    normal variates for their lengths of stay, then standard uniforms
+    for thinning time varying arrivals of each type.  Scenarios
+    scale these to their own parameters, so every scenario in a sweep
+    consumes exactly the same underlying numbers (common random numbers).
+
+    If a path is given the bank is stored as a .npy file and opened as a
+    read only memory map, with its seed and size in a .json file
+    alongside.  Only the path is pickled, so parallel workers read the
+    variates without copying or regenerating them.
+    '''
+    def __init__(self, n_reps, size=DEFAULT_BANK_SIZE, 
+                 random_number_set=DEFAULT_RNG_SET, path=None):
+        '''
+        Constructor
+
+        Params:
+        -------
+        n_reps: int
+            Number of replications to generate variates for.
+
+        size: int, optional (default=DEFAULT_BANK_SIZE)
+            Number of variates in each stream of each replication.
+
+        random_number_set: int, optional (default=DEFAULT_RNG_SET)
+            Seed used to generate the bank.  If None a seed is drawn and
+            recorded so the bank can be identified.
+
+        path: str, optional (default=None)
+            .npy file to store the bank in.  If None the bank is held in
+            memory.
+        '''
+        if random_number_set is None:
+            random_number_set = int(np.random.default_rng().integers(0, 999999999))
+        self.random_number_set = random_number_set
+        self.size = size
+
+        rng = np.random.default_rng(random_number_set)
+        shape = (n_reps, N_BANK_STREAMS, size)
+        if path is None:
+            variates = np.empty(shape)
+        else:
+            variates = np.lib.format.open_memmap(path, mode='w+', 
+                                                 dtype=np.float64, shape=shape)
+
+        for rep in range(n_reps):
+            rng.standard_exponential(out=variates[rep, :3])
+            rng.standard_normal(out=variates[rep, 3:6])
+            variates[rep, 6:] = rng.random(size=(3, size))
+
+        self.path = path
+        if path is None:
+            self.variates = variates
+        else:
+            variates.flush()
+            del variates
+            with open(path + '.json', 'w') as f:
+                json.dump(self.parameters(), f)
+            self.variates = np.load(path, mmap_mode='r')
+
+    @classmethod
+    def from_file(cls, path):
+        '''
+        Open a bank previously saved to path.
+
+        Params:
+        -------
+        path: str
+            .npy file created by RandomNumberBank
+
+        Returns:
+        --------
+        RandomNumberBank
+        '''
+        bank = cls.__new__(cls)
+        bank.__setstate__({'path': path})
+        return bank
+
+    @property
+    def n_reps(self):
+        '''
+        Number of replications held in the bank.
+        '''
+        return self.variates.shape[0]
+
+    def parameters(self):
+        '''
+        Return the seed and size that identify the bank's variates as a
+        json friendly dict.
+        '''
+        return {'random_number_set': int(self.random_number_set),
+                'size': int(self.size)}
+
+    def stream(self, replication, stream):
+        '''
+        Return a BankedStream for one stream of a replication.
+
+        Params:
+        -------
+        replication: int
+            zero based replication index
+
+        stream: int
+            stream index, 0 to N_BANK_STREAMS - 1
+        '''
+        return BankedStream(self, replication, stream)
+
+    def __getstate__(self):
+        if self.path is None:
+            return self.__dict__
+        return {'path': self.path}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if 'variates' not in state:
+            self.variates = np.load(self.path, mmap_mode='r')
+            with open(self.path + '.json') as f:
+                self.__dict__.update(json.load(f))
+
+
+# Time varying arrival classes
+
+
+class PiecewiseArrivalProfile:
+    '''
+    Piecewise constant arrival rate profile.
+
+    Each multiplier scales the base arrival rate (1 / mean IAT) of a
+    patient type for one interval.  The profile repeats every
+    len(multipliers) * interval days, e.g. 7 multipliers with interval=1
+    is a weekly pattern and 24 multipliers with interval=1/24 is an
+    hourly pattern.  Multipliers that average 1 keep the annual demand of
+    the constant rate model.
+    '''
+    def __init__(self, multipliers, interval=1.0):
+        '''
+        Constructor
+
+        Params:
+        ------
+        multipliers: array-like
+            rate multiplier for each interval of the cycle.
+
+        interval: float, optional (default=1.0)
+            length of each interval in days.
+        '''
+        self.multipliers = np.asarray(multipliers, dtype=float)
+        if (self.multipliers < 0).any():
+            raise ValueError('Arrival rate multipliers must not be negative')
+        if self.multipliers.max() <= 0:
+            raise ValueError('At least one arrival rate multiplier must be '
+                             + 'greater than zero')
+        self.interval = interval
+        self.max_multiplier = float(self.multipliers.max())
+
+    def multiplier(self, times):
+        '''
+        Return the rate multiplier at each of times.
+
+        Params:
+        -------
+        times: numpy.ndarray
+            simulation times in days
+        '''
+        idx = (times // self.interval).astype(int) % len(self.multipliers)
+        return self.multipliers[idx]
+
+    def parameters(self):
+        '''
+        Return the profile as a json friendly dict.
+        '''
+        return {'multipliers': self.multipliers.tolist(),
+                'interval': float(self.interval)}
+
+
+class FunctionArrivalProfile:
+    '''
+    Arrival rate profile given by a function of simulation time.
+
+    The profile is identified by its name in checkpoint manifests, so
+    give different functions different names.
+    '''
+    def __init__(self, func, max_multiplier, name=None):
+        '''
+        Constructor
+
+        Params:
+        ------
+        func: callable
+            vectorised function mapping a numpy array of times (days) to
+            rate multipliers of the base arrival rate.
+
+        max_multiplier: float
+            upper bound of func over the run.  Used for thinning, so a
+            tight bound keeps the number of rejected candidates low.
+
+        name: str, optional (default=None)
+            name identifying the profile.  Defaults to func.__name__ and
+            is required for lambdas.
+        '''
+        if name is None:
+            name = getattr(func, '__name__', '<lambda>')
+        if name == '<lambda>':
+            raise ValueError('FunctionArrivalProfile needs a name for a '
+                             + 'lambda or unnamed callable')
+        if max_multiplier <= 0:
+            raise ValueError('max_multiplier must be greater than zero')
+        self.func = func
+        self.max_multiplier = float(max_multiplier)
+        self.name = name
+
+    def multiplier(self, times):
+        '''
+        Return the rate multiplier at each of times.
+
+        Params:
+        -------
+        times: numpy.ndarray
+            simulation times in days
+        '''
+        return np.asarray(self.func(times), dtype=float)
+
+    def parameters(self):
+        '''
+        Return the profile as a json friendly dict.
+        '''
+        return {'func': self.name,
+                'max_multiplier': self.max_multiplier}
+
+
+class ThinnedArrivals:
+    '''
+    Non-stationary Poisson arrivals generated by thinning.
+
+    Candidate arrivals at the peak rate are produced in blocks by scaling
+    samples from the homogeneous inter-arrival distribution, and each is
+    kept with probability multiplier(t) / max_multiplier.  Working in
+    numpy blocks keeps the cost per arrival close to the constant rate
+    model.  sample(now) returns the time from the current simulation
+    time to the next arrival, so the profile stays aligned with the
+    simulation clock however late the stream is created.
+    '''
+    def __init__(self, arrival_dist, profile, acceptance_dist, 
+                 block_size=THINNING_BLOCK_SIZE):
+        '''
+        Constructor
+
+        Params:
+        ------
+        arrival_dist: Exponential or BankedExponential
+            homogeneous inter-arrival distribution at the base rate.
+
+        profile: PiecewiseArrivalProfile or FunctionArrivalProfile
+            arrival rate profile
+
+        acceptance_dist: Uniform or BankedStream
+            standard uniforms for the acceptance tests.
+
+        block_size: int, optional (default=THINNING_BLOCK_SIZE)
+            number of candidate arrivals generated at a time.
+        '''
+        self.arrival_dist = arrival_dist
+        self.profile = profile
+        self.acceptance_dist = acceptance_dist
+        self.block_size = block_size
+
+        # time of last candidate
+        self.clock = 0.0
+
+        # accepted arrival times not yet returned
+        self.arrivals = []
+        self.position = 0
+
+    def next_block(self):
+        '''
+        Generate a block of candidate arrivals and keep the accepted ones.
+        '''
+        max_multiplier = self.profile.max_multiplier
+        gaps = self.arrival_dist.sample(size=self.block_size) / max_multiplier
+        times = self.clock + np.cumsum(gaps)
+        self.clock = float(times[-1])
+
+        multipliers = self.profile.multiplier(times)
+        if (multipliers > max_multiplier).any() or (multipliers < 0).any():
+            raise ValueError('Arrival rate multiplier outside [0, '
+                             + f'{max_multiplier}] between {times[0]:.3f} '
+                             + f'and {times[-1]:.3f}')
+
+        u = self.acceptance_dist.sample(size=self.block_size)
+        accept = u * max_multiplier <= multipliers
+        self.arrivals = times[accept].tolist()
+        self.position = 0
+
+    def sample(self, now=0.0):
+        '''
+        Return the time until the next arrival.
+
+        Params:
+        -------
+        now: float, optional (default=0.0)
+            current simulation time.
+        '''
+        if self.clock < now:
+            # start candidates from the current time.  Poisson arrivals
+            # are memoryless so this does not bias the stream.
+            self.clock = now
+            self.arrivals = []
+            self.position = 0
+
+        while self.position >= len(self.arrivals):
+            self.next_block()
+
+        arrival_time = self.arrivals[self.position]
+        self.position += 1
+        return arrival_time - now
+
+
 #Scenario class
 class Scenario:
     '''
     Parameter container class for ASU model.
     '''
 
-    def __init__(self, random_number_set=DEFAULT_RNG_SET):
+    def __init__(self, random_number_set=DEFAULT_RNG_SET, rn_bank=None):
         '''
         Initialize the Scenario object with default values.
 
@@ -157,6 +637,10 @@ class Scenario:
         ----------
         random_number_set: int, optional
             The random number set to be used by the simulation.
+
+        rn_bank: RandomNumberBank, optional
+            If set, arrival and treatment times are taken from the bank
+            instead of being sampled for each run.
         '''
 
         # Warm-up period
@@ -167,7 +651,13 @@ class Scenario:
         self.treat_means = TREAT_MEANs
         self.treat_stds = TREAT_STDs
 
+        # Time varying arrival rate profiles keyed by patient type.
+        # Patient types without a profile arrive at a constant rate.
+        self.arrival_profiles = {}
+
         # Sampling
+        self.rn_bank = rn_bank
+        self.bank_replication = 0
         self.random_number_set = random_number_set
         self.init_sampling()
 
@@ -197,21 +687,63 @@ class Scenario:
         # Initialize the random seeds for each stream
         self.seeds = rng_streams.integers(0, 999999999, size=N_STREAMS)
 
-        # Create inter-arrival time distributions for each patient type
+        if self.rn_bank is not None:
+            self.init_bank_sampling()
+        else:
+            # Create inter-arrival time distributions for each patient type
+            self.arrival_dist_samples = {
+                'stroke': Exponential(self.iat_means[0], random_seed=self.seeds[0]),
+                'tia': Exponential(self.iat_means[1], random_seed=self.seeds[1]),
+                'neuro': Exponential(self.iat_means[2], random_seed=self.seeds[2])
+            }
+
+            # Create treatment time distributions for each patient type
+            self.treatment_dist_samples = {
+                'stroke': Lognormal(self.treat_means[0], self.treat_stds[0], 
+                                    random_seed=self.seeds[3]),
+                'tia': Lognormal(self.treat_means[1], self.treat_stds[1], 
+                                 random_seed=self.seeds[4]),
+                'neuro': Lognormal(self.treat_means[2], self.treat_stds[2], 
+                                   random_seed=self.seeds[5])
+            }
+
+        # Time varying arrivals thin the constant rate streams
+        for i, patient_type in enumerate(['stroke', 'tia', 'neuro']):
+            profile = self.arrival_profiles.get(patient_type)
+            if profile is not None:
+                if self.rn_bank is not None:
+                    acceptance_dist = self.rn_bank.stream(self.bank_replication, 
+                                                          6 + i)
+                else:
+                    acceptance_dist = Uniform(random_seed=self.seeds[6 + i])
+                self.arrival_dist_samples[patient_type] = ThinnedArrivals(
+                    self.arrival_dist_samples[patient_type], profile,
+                    acceptance_dist)
+
+
+    def init_bank_sampling(self):
+        '''
+        Create the distributions used by the simulation from the variates
+        held in the random number bank for the current bank_replication.
+        '''
+        rep = self.bank_replication
+
         self.arrival_dist_samples = {
-            'stroke': Exponential(self.iat_means[0], random_seed=self.seeds[0]),
-            'tia': Exponential(self.iat_means[1], random_seed=self.seeds[1]),
-            'neuro': Exponential(self.iat_means[2], random_seed=self.seeds[2])
+            'stroke': BankedExponential(self.iat_means[0], 
+                                        self.rn_bank.stream(rep, 0)),
+            'tia': BankedExponential(self.iat_means[1], 
+                                     self.rn_bank.stream(rep, 1)),
+            'neuro': BankedExponential(self.iat_means[2], 
+                                       self.rn_bank.stream(rep, 2))
         }
 
-        # Create treatment time distributions for each patient type
         self.treatment_dist_samples = {
-            'stroke': Lognormal(self.treat_means[0], self.treat_stds[0], 
-                                random_seed=self.seeds[3]),
-            'tia': Lognormal(self.treat_means[1], self.treat_stds[1], 
-                             random_seed=self.seeds[4]),
-            'neuro': Lognormal(self.treat_means[2], self.treat_stds[2], 
-                               random_seed=self.seeds[5])
+            'stroke': BankedLognormal(self.treat_means[0], self.treat_stds[0], 
+                                      self.rn_bank.stream(rep, 3)),
+            'tia': BankedLognormal(self.treat_means[1], self.treat_stds[1], 
+                                   self.rn_bank.stream(rep, 4)),
+            'neuro': BankedLognormal(self.treat_means[2], self.treat_stds[2], 
+                                     self.rn_bank.stream(rep, 5))
         }
 
         
@@ -443,7 +975,11 @@ class ASU:
         
     def get_arrival_dist_sample(self):
         
-        inter_arrival_time = self.args.arrival_dist_samples[self.patient_type].sample()
+        arrival_dist = self.args.arrival_dist_samples[self.patient_type]
+        if isinstance(arrival_dist, ThinnedArrivals):
+            # time varying arrivals depend on the current simulation time
+            return arrival_dist.sample(now=self.env.now)
+        inter_arrival_time = arrival_dist.sample()
         return inter_arrival_time
             
         
@@ -565,7 +1101,8 @@ class ASU:
 def single_run(scenario, 
                rc_period = RUN_LENGTH, 
                warm_up = 0,
-               random_no_set = DEFAULT_RNG_SET):
+               random_no_set = DEFAULT_RNG_SET,
+               replication = None):
     '''
     Perform a single run of the model and return the results
     
@@ -586,6 +1123,10 @@ def single_run(scenario,
         Controls the set of random seeds used by the stochastic parts of the 
         model.  Set to different ints to get different results.  Set to None
         for a random set of seeds.
+
+    replication: int or None, optional (default=None)
+        Replication of the scenario's random number bank to use.  Ignored
+        if the scenario has no bank.
         
     Returns:
     --------
@@ -593,6 +1134,10 @@ def single_run(scenario,
         results from single run.
     '''  
         
+    # select the bank replication before sampling is initialised
+    if replication is not None:
+        scenario.bank_replication = replication
+
     # set random number set - this controls sampling for the run.
     if random_no_set is not None:
         scenario.set_random_no_set(random_no_set)
@@ -648,12 +1193,17 @@ def multiple_replications(scenario,
         rng_sets = [random_no_set + rep for rep in range(n_reps)]
     else:
         rng_sets = [None] * n_reps
+
+    if scenario.rn_bank is not None and scenario.rn_bank.n_reps < n_reps:
+        raise ValueError(f'Random number bank holds {scenario.rn_bank.n_reps} '
+                         + f'replications; {n_reps} requested')
        
     res = Parallel(n_jobs=n_jobs)(delayed(single_run)(scenario, 
                                                       rc_period, 
                                                       warm_up, 
-                                                      random_no_set=rng_set) 
-                                    for rng_set in rng_sets)
+                                                      random_no_set=rng_set,
+                                                      replication=rep) 
+                                    for rep, rng_set in enumerate(rng_sets))
     
 
     # format and return results in a dataframe
@@ -662,3 +1212,165 @@ def multiple_replications(scenario,
     df_results.index.name = 'rep'
     return df_results
 
+
+# Checkpointed replications for long campaigns
+
+# file names used inside a checkpoint directory
+CHECKPOINT_MANIFEST = 'manifest.json'
+CHECKPOINT_REP_FILE = 'rep_{0:05d}.pkl'
+
+
+def scenario_parameters(scenario):
+    '''
+    Return the parameters of a scenario that determine its results as a
+    json friendly dict.  Used to check that a checkpoint is resumed with
+    the same scenario that created it.
+
+    Params:
+    -------
+    scenario: Scenario
+        The scenario to describe
+
+    Returns:
+    --------
+    dict
+    '''
+    return {'n_beds': int(scenario.n_beds),
+            'iat_means': [float(x) for x in scenario.iat_means],
+            'treat_means': [float(x) for x in scenario.treat_means],
+            'treat_stds': [float(x) for x in scenario.treat_stds],
+            'arrival_profiles': {patient_type: profile.parameters() for 
+                                 patient_type, profile in 
+                                 scenario.arrival_profiles.items()},
+            'rn_bank': (None if scenario.rn_bank is None 
+                        else scenario.rn_bank.parameters())}
+
+
+def _checkpointed_single_run(scenario, rc_period, warm_up, rng_set, 
+                             replication, rep_path):
+    '''
+    Perform a single run of the model and persist its results to
+    rep_path as soon as it completes.  The file is written to a temporary
+    name and then moved into place so a killed run never leaves a
+    partially written replication behind.
+
+    Returns:
+    --------
+        pandas.DataFrame:
+        results from single run.
+    '''
+    res = single_run(scenario, rc_period, warm_up, random_no_set=rng_set,
+                     replication=replication)
+    tmp_path = rep_path + '.tmp'
+    res.to_pickle(tmp_path)
+    os.replace(tmp_path, rep_path)
+    return res
+
+
+def checkpointed_replications(scenario,
+                              checkpoint_dir,
+                              rc_period=RUN_LENGTH,
+                              warm_up=0,
+                              n_reps=DEFAULT_N_REPS,
+                              n_jobs=-1):
+    '''
+    Perform multiple replications of the model, persisting each
+    replication to checkpoint_dir as it finishes.  If the campaign is
+    interrupted, calling the function again with the same arguments only
+    runs the replications that are missing and returns results identical
+    to an uninterrupted run.
+
+    The random number sets used by each replication are recorded in a
+    manifest in checkpoint_dir.  If the scenario has no random number set
+    a base set is drawn and recorded so that a resumed campaign is still
+    reproducible.
+
+    Params:
+    ------
+    scenario: Scenario
+        Parameters/arguments to configure the model
+
+    checkpoint_dir: str
+        Directory used to store the manifest and completed replications.
+        Created if it does not exist.
+
+    rc_period: float, optional (default=RUN_LENGTH)
+        results collection period.
+
+    warm_up: float, optional (default=0)
+        initial transient period.  no results are collected in this period
+
+    n_reps: int, optional (default=DEFAULT_N_REPS)
+        Number of independent replications to run.
+
+    n_jobs, int, optional (default=-1)
+        No. replications to run in parallel.
+
+    Returns:
+    --------
+    pandas.DataFrame
+    '''
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    manifest_path = os.path.join(checkpoint_dir, CHECKPOINT_MANIFEST)
+
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+
+        # a checkpoint can only be resumed by the campaign that created it
+        expected = {'rc_period': rc_period,
+                    'warm_up': warm_up,
+                    'n_reps': n_reps,
+                    'scenario': scenario_parameters(scenario)}
+        for key, value in expected.items():
+            if manifest[key] != value:
+                raise ValueError(f'Checkpoint in {checkpoint_dir} was created '
+                                 + f'with {key}={manifest[key]}, not {value}')
+        rng_sets = manifest['rng_sets']
+
+        # a campaign started without a seed records a drawn one, so only
+        # check the seed when the scenario sets one
+        random_no_set = scenario.random_number_set
+        if random_no_set is not None and rng_sets[0] != random_no_set:
+            raise ValueError(f'Checkpoint in {checkpoint_dir} was created '
+                             + f'with random_number_set={rng_sets[0]}, '
+                             + f'not {random_no_set}')
+    else:
+        random_no_set = scenario.random_number_set
+        if random_no_set is None:
+            # record a base set so the campaign can be resumed exactly
+            random_no_set = int(np.random.default_rng().integers(0, 999999999))
+
+        rng_sets = [random_no_set + rep for rep in range(n_reps)]
+        manifest = {'rc_period': rc_period,
+                    'warm_up': warm_up,
+                    'n_reps': n_reps,
+                    'scenario': scenario_parameters(scenario),
+                    'rng_sets': rng_sets}
+        tmp_path = manifest_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, manifest_path)
+
+    if scenario.rn_bank is not None and scenario.rn_bank.n_reps < n_reps:
+        raise ValueError(f'Random number bank holds {scenario.rn_bank.n_reps} '
+                         + f'replications; {n_reps} requested')
+
+    rep_paths = [os.path.join(checkpoint_dir, CHECKPOINT_REP_FILE.format(rep))
+                 for rep in range(n_reps)]
+    pending = [rep for rep in range(n_reps) if not os.path.exists(rep_paths[rep])]
+    trace(f'{n_reps - len(pending)} of {n_reps} replications found in checkpoint')
+
+    Parallel(n_jobs=n_jobs)(delayed(_checkpointed_single_run)(scenario,
+                                                              rc_period,
+                                                              warm_up,
+                                                              rng_sets[rep],
+                                                              rep,
+                                                              rep_paths[rep])
+                            for rep in pending)
+
+    # format and return results in a dataframe
+    df_results = pd.concat([pd.read_pickle(path) for path in rep_paths])
+    df_results.index = np.arange(1, len(df_results)+1)
+    df_results.index.name = 'rep'
+    return df_results
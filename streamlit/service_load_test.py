@@ -0,0 +1,117 @@
+'''
+Load test for the local simulation service.
+
+For each concurrency level a batch of clients submit requests at the
+same time.  A fraction of clients send the identical default scenario
+(as the streamlit front end does) and the rest send distinct scenarios.
+Reports throughput and request latency for each level.
+
+By default the service is started in this process on a free port.  Use
+--port to test a service that is already running.
+
+Usage (from the streamlit directory):
+    python service_load_test.py --concurrency 1 2 4 8 16
+'''
+import argparse
+import asyncio
+import time
+
+import numpy as np
+
+from resources.service import (SimulationService, request_simulation,
+                               DEFAULT_HOST)
+
+
+# replications and run length per request; kept short so a load test
+# finishes quickly
+LOAD_TEST_N_REPS = 5
+LOAD_TEST_RC_PERIOD = 365
+
+DEFAULT_CONCURRENCY = [1, 2, 4, 8, 16]
+DEFAULT_DUPLICATE_FRACTION = 0.5
+
+
+async def timed_request(request, host, port):
+    '''
+    Send a request and return the time to the first replication and the
+    time to the final result in seconds.
+    '''
+    start = time.perf_counter()
+    first = None
+    async for message in request_simulation(request, host, port):
+        if message['type'] == 'error':
+            raise RuntimeError(message['message'])
+        if first is None:
+            first = time.perf_counter() - start
+    return first, time.perf_counter() - start
+
+
+async def run_level(concurrency, duplicate_fraction, host, port, level):
+    '''
+    Run one concurrency level and return its statistics.
+    '''
+    n_duplicates = int(round(concurrency * duplicate_fraction))
+    requests = []
+    for i in range(concurrency):
+        request = {'n_reps': LOAD_TEST_N_REPS,
+                   'rc_period': LOAD_TEST_RC_PERIOD,
+                   'random_number_set': 333}
+        if i >= n_duplicates:
+            # distinct scenario for each client
+            request['random_number_set'] = 1000 * level + i
+        requests.append(request)
+
+    start = time.perf_counter()
+    timings = await asyncio.gather(*[timed_request(r, host, port)
+                                     for r in requests])
+    elapsed = time.perf_counter() - start
+
+    latency = np.array([total for _, total in timings])
+    first = np.array([first for first, _ in timings])
+    return {'concurrency': concurrency,
+            'throughput': concurrency / elapsed,
+            'first_result': first.mean(),
+            'p50': np.percentile(latency, 50),
+            'p95': np.percentile(latency, 95)}
+
+
+async def main(concurrency_levels, duplicate_fraction, host, port, n_workers):
+    '''
+    Run the load test at each concurrency level and print a table.
+    '''
+    service = None
+    if port is None:
+        service = SimulationService(n_workers)
+        server = await service.serve(host, 0)
+        port = server.sockets[0].getsockname()[1]
+
+    print(f'{"clients":>8} {"req/s":>8} {"first (s)":>10} {"p50 (s)":>8} '
+          + f'{"p95 (s)":>8}')
+    for level, concurrency in enumerate(concurrency_levels):
+        r = await run_level(concurrency, duplicate_fraction, host, port, level)
+        print(f'{r["concurrency"]:>8} {r["throughput"]:>8.2f} '
+              + f'{r["first_result"]:>10.2f} {r["p50"]:>8.2f} {r["p95"]:>8.2f}')
+
+    if service is not None:
+        print(f'requests: {service.requests_received}, '
+              + f'merged: {service.requests_merged}, '
+              + f'replications run: {service.replications_run}')
+        server.close()
+        await server.wait_closed()
+        await service.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Simulation service load test')
+    parser.add_argument('--concurrency', type=int, nargs='+',
+                        default=DEFAULT_CONCURRENCY)
+    parser.add_argument('--duplicate-fraction', type=float,
+                        default=DEFAULT_DUPLICATE_FRACTION,
+                        help='fraction of clients sending the same request')
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=None,
+                        help='port of a running service')
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+    asyncio.run(main(args.concurrency, args.duplicate_fraction, args.host,
+                     args.port, args.workers))